@@ -0,0 +1,29 @@
+"""Shared fixtures: the bundled sample data and the built-in strategies and sizers"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import backtest_program_pro as bp  # noqa: E402
+
+SAMPLE_CSV = os.path.join(ROOT, 'sample_data_full.csv')
+
+BUILTIN_STRATEGIES = [entry['class'] for entry in bp.STRATEGIES.values()
+                      if entry['class'] is not None]
+
+SIZER_CASES = [
+    (bp.PercentSizer, {'percents': 95}),
+    (bp.AllInSizer, {}),
+    (bp.FixedAmountSizer, {'amount': 10000}),
+    (bp.FixedSharesSizer, {'shares': 100}),
+]
+
+
+@pytest.fixture(scope='session')
+def sample_data():
+    """sample_data_full.csv as a DataFrame with lower-case OHLCV columns"""
+    return bp.read_ohlcv_file(SAMPLE_CSV)
@@ -0,0 +1,88 @@
+"""FastBroker must fill, charge and report exactly like BackBroker"""
+
+import pytest
+
+import backtest_program_pro as bp
+from conftest import BUILTIN_STRATEGIES, SIZER_CASES
+
+
+def _logging(strategy_class):
+    """Subclass of strategy_class that logs every order, trade and fund notification"""
+    class Logged(strategy_class):
+        def __init__(self):
+            super().__init__()
+            self.log = []
+        
+        def notify_order(self, order):
+            self.log.append(('order', len(self), order.getstatusname(), order.executed.dt,
+                             order.executed.price, order.executed.size,
+                             order.executed.comm, order.executed.pnl))
+        
+        def notify_trade(self, trade):
+            self.log.append(('trade', len(self), trade.status, trade.price, trade.pnl,
+                             trade.pnlcomm))
+        
+        def notify_fund(self, cash, value, fundvalue, shares):
+            self.log.append(('fund', len(self), cash, value))
+    
+    Logged.__name__ = strategy_class.__name__
+    return Logged
+
+
+def _run(data, strategy_class, sizer_class, sizer_params, broker):
+    cerebro = bp.build_cerebro(data, _logging(strategy_class), 100000.0, 0.001,
+                               sizer_class, sizer_params, broker=broker)
+    strat = cerebro.run()[0]
+    return {
+        'log': strat.log,
+        'cash': cerebro.broker.getcash(),
+        'value': cerebro.broker.getvalue(),
+        'trades': repr(strat.analyzers.trades.get_analysis()),
+        'drawdown': repr(strat.analyzers.drawdown.get_analysis()),
+    }
+
+
+@pytest.mark.parametrize('coc', [False, True], ids=['next-open', 'close'])
+@pytest.mark.parametrize('sizer_class, sizer_params', SIZER_CASES,
+                         ids=[sizer.__name__ for sizer, _ in SIZER_CASES])
+@pytest.mark.parametrize('strategy_class', BUILTIN_STRATEGIES,
+                         ids=[cls.__name__ for cls in BUILTIN_STRATEGIES])
+def test_matches_back_broker(sample_data, strategy_class, sizer_class, sizer_params, coc):
+    back = _run(sample_data, strategy_class, sizer_class, sizer_params,
+                bp.bt.brokers.BackBroker(coc=coc))
+    fast = _run(sample_data, strategy_class, sizer_class, sizer_params, bp.FastBroker(coc=coc))
+    assert fast == back
+    assert any(entry[0] == 'order' for entry in back['log'])
+
+
+def test_rejects_non_market_orders(sample_data):
+    class LimitBuyer(bp.bt.Strategy):
+        def next(self):
+            self.buy(exectype=bp.bt.Order.Limit, price=self.data.close[0])
+    
+    cerebro = bp.build_cerebro(sample_data, LimitBuyer, 100000.0, 0.001, bp.PercentSizer, {},
+                               broker='fast')
+    with pytest.raises(ValueError, match='market orders'):
+        cerebro.run()
+
+
+def test_rejects_slippage(sample_data):
+    cerebro = bp.build_cerebro(sample_data, bp.SMACrossover, 100000.0, 0.001, bp.PercentSizer,
+                               {}, broker='fast')
+    cerebro.broker.set_slippage_perc(0.01)
+    with pytest.raises(ValueError, match='slippage'):
+        cerebro.run()
+
+
+def test_checkpoint_is_keyed_by_broker(sample_data, tmp_path):
+    path = str(tmp_path / 'run.ckpt')
+    args = (bp.SMACrossover, 100000.0, 0.001, bp.PercentSizer, {'percents': 95})
+    bp.build_cerebro(sample_data.iloc[:200], *args, checkpoint=path, broker='fast').run()
+    
+    resumed = bp.build_cerebro(sample_data, *args, checkpoint=path, broker='fast')
+    assert isinstance(resumed.broker, bp.FastBroker)
+    assert resumed.resumed_bars == len(sample_data) - 200
+    
+    other = bp.build_cerebro(sample_data, *args, checkpoint=path)
+    assert type(other.broker) is bp.bt.brokers.BackBroker
+    assert other.checkpoint_note.startswith('Checkpoint not used')
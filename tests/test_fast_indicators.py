@@ -0,0 +1,71 @@
+"""Every line of each Fast* indicator must equal the stock backtrader indicator it replaces"""
+
+import numpy as np
+import pytest
+
+import backtest_program_pro as bp
+
+bt = bp.bt
+
+# (fast class, stock class, params, takes the whole feed instead of the close line)
+CASES = [
+    (bp.FastSMA, bt.indicators.SMA, {'period': 15}, False),
+    (bp.FastEMA, bt.indicators.EMA, {'period': 15}, False),
+    (bp.FastStandardDeviation, bt.indicators.StdDev, {'period': 20}, False),
+    (bp.FastBollingerBands, bt.indicators.BollingerBands, {'period': 20, 'devfactor': 2.0}, False),
+    (bp.FastMomentum, bt.indicators.Momentum, {'period': 12}, False),
+    (bp.FastStochastic, bt.indicators.Stochastic,
+     {'period': 14, 'period_dfast': 3, 'period_dslow': 3}, True),
+    (bp.FastRSI, bt.indicators.RSI, {'period': 14}, False),
+    (bp.FastMACD, bt.indicators.MACD, {'period_me1': 12, 'period_me2': 26, 'period_signal': 9},
+     False),
+]
+
+
+@pytest.fixture(params=['numpy', 'kernel', 'numba'])
+def jit_backend(request, monkeypatch):
+    """
+    Smoothing backend: the pure-NumPy fallback, the loop kernels run as
+    plain Python (what numba compiles, checkable without numba) or the
+    numba-compiled kernels when numba is installed.
+    """
+    monkeypatch.setattr(bp, 'INDICATOR_CACHE', None)
+    kernels = (bp._smooth_loop, bp._smooth_grid_loop)
+    if request.param == 'numba':
+        pytest.importorskip('numba')
+        monkeypatch.setattr(bp, '_JIT_KERNELS', {})
+    elif request.param == 'kernel':
+        monkeypatch.setattr(bp, '_JIT_KERNELS', {kernel: kernel for kernel in kernels})
+    else:
+        monkeypatch.setattr(bp, '_JIT_KERNELS', {kernel: None for kernel in kernels})
+    return request.param
+
+
+def _lines(data, indicator_class, params, whole_feed, runonce):
+    """Run indicator_class over data and return {line name: values}"""
+    class Holder(bt.Strategy):
+        def __init__(self):
+            self.indicator = indicator_class(self.data if whole_feed else self.data.close,
+                                             **params)
+    
+    cerebro = bt.Cerebro(stdstats=False, runonce=runonce)
+    cerebro.adddata(bt.feeds.PandasData(dataname=data))
+    cerebro.addstrategy(Holder)
+    indicator = cerebro.run()[0].indicator
+    return {name: np.array(getattr(indicator.lines, name).array, dtype=np.float64)
+            for name in indicator.lines.getlinealiases()}
+
+
+@pytest.mark.parametrize('runonce', [True, False], ids=['once', 'next'])
+@pytest.mark.parametrize('fast_class, stock_class, params, whole_feed', CASES,
+                         ids=[case[0].__name__ for case in CASES])
+def test_matches_stock_indicator(sample_data, jit_backend, fast_class, stock_class, params,
+                                 whole_feed, runonce):
+    fast = _lines(sample_data, fast_class, params, whole_feed, runonce)
+    stock = _lines(sample_data, stock_class, params, whole_feed, runonce)
+    assert set(stock) <= set(fast)
+    for name, expected in stock.items():
+        assert len(fast[name]) == len(expected)
+        assert np.isfinite(expected).any()
+        np.testing.assert_allclose(fast[name], expected, rtol=1e-9, atol=1e-9, equal_nan=True,
+                                   err_msg=f"{fast_class.__name__}.{name}")
@@ -0,0 +1,46 @@
+"""Indicator grids match the single-period functions and priming stays inside the cache budget"""
+
+import numpy as np
+import pytest
+
+import backtest_program_pro as bp
+
+
+@pytest.fixture
+def indicator_cache(monkeypatch):
+    """Fresh process-wide indicator cache, restored afterwards"""
+    def configure(max_bytes):
+        cache = bp.IndicatorCache(max_bytes)
+        monkeypatch.setattr(bp, 'INDICATOR_CACHE', cache)
+        return cache
+    return configure
+
+
+@pytest.mark.parametrize('func', [bp.vec_sma, bp.vec_ema, bp.vec_stddev, bp.vec_rsi])
+def test_grid_rows_match_single_periods(sample_data, func):
+    close = sample_data['close'].to_numpy(dtype=np.float64)
+    periods = [2, 5, 14, 30]
+    grid = bp.indicator_grid(close, bp._GRID_KINDS[func], periods)
+    
+    for row, period in zip(grid, periods):
+        np.testing.assert_allclose(row, func(close, period), rtol=1e-9, equal_nan=True)
+
+
+def test_priming_stops_at_the_cache_budget(sample_data, indicator_cache):
+    row_bytes = 8 * len(sample_data)
+    cache = indicator_cache(10 * row_bytes)
+    grid = {'fast_period': range(2, 12), 'slow_period': range(20, 40)}
+    
+    assert bp.prime_indicator_grid(sample_data, bp.SMACrossover, grid) == 10
+    assert len(cache) == 10 and cache.stats['evictions'] == 0
+    assert bp.prime_indicator_grid(sample_data, bp.SMACrossover, grid) == 0
+
+
+def test_sweep_with_a_small_cache_matches_an_unprimed_sweep(sample_data, indicator_cache):
+    grid = {'fast_period': [5, 10, 15], 'slow_period': [20, 30, 40]}
+    indicator_cache(4 * 8 * len(sample_data))
+    primed = bp.run_param_sweep(sample_data, bp.SMACrossover, grid, workers=1, engine='vector')
+    indicator_cache(0)
+    plain = bp.run_param_sweep(sample_data, bp.SMACrossover, grid, workers=1, engine='vector')
+    
+    assert primed['final_value'].tolist() == plain['final_value'].tolist()
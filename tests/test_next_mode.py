@@ -0,0 +1,87 @@
+"""Signal lines in next() mode: resumed and non-runonce runs match runonce runs, O(1) per bar"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest_program_pro as bp
+
+ARGS = (100000.0, 0.001, bp.PercentSizer, {'percents': 95})
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return bp.generate_synthetic_ohlcv(800, seed=5)
+
+
+def _memmap(data):
+    index = pd.DatetimeIndex(data.index).tz_localize(None)
+    return bp.MemmapSeries(index.values.astype('datetime64[ns]').astype(np.int64),
+                           {str(col).lower(): data[col].to_numpy(dtype=np.float64)
+                            for col in data.columns})
+
+
+@pytest.fixture
+def evaluations(monkeypatch):
+    """Count calls of a _SignalLines subclass's _evaluate"""
+    calls = []
+    
+    def count(cls):
+        evaluate = cls._evaluate
+        
+        def counted(self, columns, end):
+            calls.append(end)
+            return evaluate(self, columns, end)
+        monkeypatch.setattr(cls, '_evaluate', counted)
+        return calls
+    return count
+
+
+@pytest.mark.parametrize('memmap', [False, True])
+@pytest.mark.parametrize('new_bars_only', [False, True])
+def test_resumed_rule_strategy_matches_a_full_run(bars, evaluations, tmp_path, memmap,
+                                                  new_bars_only):
+    strategy = bp.compile_rule_strategy('rsi(p) < 40 and close > ema(50)',
+                                        'rsi(p) > 60 or close < sma(20)', {'p': 14},
+                                        name='ResumeRule')
+    convert = _memmap if memmap else (lambda data: data)
+    full = bp.build_cerebro(convert(bars), strategy, *ARGS)
+    expected = repr(full.run()[0].analyzers.trades.get_analysis())
+    
+    path = str(tmp_path / 'rule.ckpt')
+    bp.build_cerebro(convert(bars.iloc[:500]), strategy, *ARGS, checkpoint=path).run()
+    calls = evaluations(bp._RuleSignals)
+    resumed = bp.build_cerebro(convert(bars.iloc[500:] if new_bars_only else bars), strategy,
+                               *ARGS, checkpoint=path)
+    strat = resumed.run()[0]
+    
+    assert resumed.resumed_bars == 300
+    assert resumed.broker.getvalue() == full.broker.getvalue()
+    assert repr(strat.analyzers.trades.get_analysis()) == expected
+    assert calls == [800]
+
+
+def _run_portfolio(bars, **cerebro_args):
+    classes = [bp.SMACrossover, bp.RSIStrategy, bp.MACDStrategy, bp.BollingerBandsStrategy,
+               bp.TripleSMAStrategy]
+    pairs = [{'data': k % 2, 'strategy_class': cls, 'strategy_params': {},
+              'weight': 1.0 / len(classes)} for k, cls in enumerate(classes)]
+    cerebro = bp.bt.Cerebro(stdstats=False, **cerebro_args)
+    for data in (bars, bp.generate_synthetic_ohlcv(len(bars), seed=6)):
+        cerebro.adddata(bp.MemmapData(dataname=_memmap(data)))
+    cerebro.addstrategy(bp.PortfolioStrategy, pairs=pairs)
+    cerebro.addsizer(bp.PortfolioSizer, percents=95)
+    cerebro.broker.setcash(100000.0)
+    cerebro.broker.setcommission(commission=0.001)
+    strat = cerebro.run()[0]
+    return cerebro.broker.getvalue(), [(p['entries'], p['trades'], p['pnl']) for p in strat.pairs]
+
+
+@pytest.mark.parametrize('cerebro_args', [{'runonce': False}, {'preload': False}])
+def test_portfolio_signals_in_next_mode_match_runonce(bars, evaluations, cerebro_args):
+    expected = _run_portfolio(bars)
+    calls = evaluations(bp._StrategySignals)
+    
+    assert _run_portfolio(bars, **cerebro_args) == expected
+    # Preloaded feeds are evaluated once per pair; streamed ones use STREAMING_SIGNALS
+    assert calls == ([800] * 5 if cerebro_args.get('preload', True) else [])
@@ -0,0 +1,27 @@
+"""Importing the program must stay within the startup budget and defer heavy modules"""
+
+import json
+import subprocess
+import sys
+
+import backtest_program_pro as bp
+from conftest import ROOT
+
+
+def test_startup_within_budget():
+    report = bp.check_startup_time()
+    assert report['eager_modules'] == []
+    assert report['ok'], report
+
+
+def test_cold_import_defers_heavy_modules():
+    # This process has loaded pandas/numpy already, so import in a fresh interpreter
+    probe = (
+        "import json, sys\n"
+        "import backtest_program_pro\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', probe], cwd=ROOT, capture_output=True,
+                            text=True, check=True)
+    loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    assert loaded.isdisjoint(bp.DEFERRED_MODULES)
@@ -0,0 +1,97 @@
+"""Universe downloads against a local chart server: retries, missing tickers and the cache"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import backtest_program_pro as bp
+
+START, END = '2022-01-01', '2022-07-01'
+
+
+@pytest.fixture(scope='module')
+def chart_server(sample_data):
+    """Chart API on localhost: 'FLAKY' fails once with 503, 'MISSING' is a 404"""
+    window = sample_data.loc[START:END]
+    stamps = window.index.values.astype('datetime64[s]').astype(np.int64) + 16 * 3600
+    body = json.dumps({'chart': {'result': [{
+        'meta': {'gmtoffset': -4 * 3600},
+        'timestamp': stamps.tolist(),
+        'indicators': {'quote': [{col: window[col].tolist()
+                                  for col in ('open', 'high', 'low', 'close', 'volume')}]},
+    }], 'error': None}}).encode()
+    hits = {}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+        
+        def do_GET(self):
+            ticker = self.path.split('?')[0].rsplit('/', 1)[-1]
+            with lock:
+                hits[ticker] = hits.get(ticker, 0) + 1
+                count = hits[ticker]
+            if ticker == 'MISSING' or (ticker == 'FLAKY' and count == 1):
+                self.send_response(404 if ticker == 'MISSING' else 503)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/v8/finance/chart', hits, window
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(chart_server):
+    chart_server[1].clear()
+    return bp.RetryingFetcher(bp.HTTPChartFetcher(chart_server[0], timeout=5.0), backoff=0.01)
+
+
+def test_http_fetcher_reads_the_chart(chart_server):
+    url, _, window = chart_server
+    data = bp.HTTPChartFetcher(url, timeout=5.0)('AAA', START, END)
+    
+    assert list(data.index) == list(window.index)
+    np.testing.assert_allclose(data['close'].to_numpy(), window['close'].to_numpy())
+
+
+def test_503_is_retried(chart_server, fetcher):
+    data = fetcher('FLAKY', START, END)
+    
+    assert chart_server[1]['FLAKY'] == 2
+    assert len(data) == len(chart_server[2])
+
+
+def test_404_is_not_retried(chart_server, fetcher):
+    assert fetcher('MISSING', START, END) is None
+    assert chart_server[1]['MISSING'] == 1
+
+
+def test_fetch_universe_reports_missing_and_serves_repeats_from_cache(chart_server, fetcher,
+                                                                       tmp_path):
+    hits = chart_server[1]
+    cache = bp.OHLCVCache(str(tmp_path), fetcher=fetcher, namespace='chart')
+    data, errors = bp.fetch_universe(['aaa', 'FLAKY', 'MISSING', 'AAA'], START, END,
+                                     cache=cache, max_workers=4)
+    
+    assert sorted(data) == ['AAA', 'FLAKY']
+    assert errors == {'MISSING': 'no data'}
+    assert hits == {'AAA': 1, 'FLAKY': 2, 'MISSING': 1}
+    
+    again, errors = bp.fetch_universe(['AAA', 'FLAKY'], START, END, cache=cache)
+    assert errors == {}
+    assert hits == {'AAA': 1, 'FLAKY': 2, 'MISSING': 1}
+    for ticker in again:
+        np.testing.assert_allclose(again[ticker]['close'].to_numpy(),
+                                   data[ticker]['close'].to_numpy())
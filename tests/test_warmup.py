@@ -0,0 +1,40 @@
+"""Warm-up bars feed the indicators only: metrics, trades and stored results cover the window"""
+
+import pytest
+
+import backtest_program_pro as bp
+
+
+def _job(**job):
+    return dict(bp.JOB_DEFAULTS, ticker='SAMPLE', strategy='SMACrossover', end=None,
+                fast_metrics=True, **job)
+
+
+@pytest.mark.parametrize('engine', ['vector', 'cerebro'])
+def test_warmup_run_is_not_served_to_a_full_run(sample_data, engine, tmp_path):
+    results = str(tmp_path / 'results.sqlite')
+    windowed = bp.run_job(_job(start='2022-03-01', warmup=20, engine=engine, results=results),
+                          data=sample_data)
+    full_data = bp.trim_warmup(sample_data, '2022-02-01', 0)
+    full = bp.run_job(_job(start='2022-02-01', engine=engine, results=results), data=full_data)
+    fresh = bp.run_job(_job(start='2022-02-01', engine=engine), data=full_data)
+    
+    assert windowed['error'] is None and full['error'] is None
+    assert not full.get('cached')
+    assert full['bars'] == fresh['bars'] > windowed['bars']
+    assert full['exposure_pct'] == pytest.approx(fresh['exposure_pct'])
+    again = bp.run_job(_job(start='2022-03-01', warmup=20, engine=engine, results=results),
+                       data=sample_data)
+    assert again['cached']
+    assert again['exposure_pct'] == pytest.approx(windowed['exposure_pct'])
+
+
+@pytest.mark.parametrize('engine', ['vector', 'cerebro'])
+def test_warmup_is_capped_at_the_strategy_warmup(sample_data, engine):
+    auto = bp.run_job(_job(start='2022-03-01', warmup='auto', engine=engine), data=sample_data)
+    longer = bp.run_job(_job(start='2022-03-01', warmup=200, engine=engine), data=sample_data)
+    
+    assert auto['error'] is None and longer['error'] is None
+    assert longer['warmup_bars'] == auto['warmup_bars'] == 30
+    for name in ('final_value', 'return_pct', 'max_drawdown', 'trades', 'exposure_pct'):
+        assert longer[name] == pytest.approx(auto[name])